@@ -1,11 +1,12 @@
 STEAM_FEE = 0.13
+STEAM_KEEP = 1 - STEAM_FEE  # share of the sale price kept after the fee
 STEAM_URL = "https://steamcommunity.com/market/priceoverview/"
 
-def get_steam_price(item_name):
+def get_steam_price(session, item_name):
     """Fetch lowest Steam price in USD"""
     params = {"appid": 730, "currency": 1, "market_hash_name": item_name}
     try:
-        r = requests.get(STEAM_URL, params=params, timeout=10)
+        r = session.get(STEAM_URL, params=params, timeout=10)
         data = r.json()
         if data.get("success") and data.get("lowest_price"):
             return float(data["lowest_price"].replace("$", "").strip())
@@ -13,14 +14,114 @@ def get_steam_price(item_name):
         print(f"[Steam Error] {item_name}: {e}")
     return None
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import csv
 import time
 import os
 import json
+import sqlite3
+import sys
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
 
 # CSV input file (columns: Skin,Wear,Price (USD))
 SKINS_CSV = "skins.csv"
 
+# Columns of the exported price report
+CSV_FIELDNAMES = [
+    "Skin",
+    "Bought For ($)",
+    "Steam Price ($)",
+    "Steam After Fee ($)",
+    "Steam Profit/Loss ($)",
+]
+
+# Price lookups run concurrently, but Steam is still paced globally
+MAX_WORKERS = 8
+REQUEST_INTERVAL = 2.0  # seconds between request starts, across all workers
+
+# One pooled session for every price lookup so TCP/TLS connections are reused.
+# Note: urllib3 retries happen inside SESSION.get, outside the RateLimiter, so
+# while Steam answers 429/5xx a worker may send up to 3 extra (backed-off)
+# requests on top of the REQUEST_INTERVAL pacing.
+SESSION = requests.Session()
+SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+    ),
+)
+
+# On-disk price cache so re-runs within the TTL skip the network
+PRICE_CACHE_PATH = ".price_cache.sqlite3"
+PRICE_CACHE_TTL = int(os.getenv("PRICE_CACHE_TTL", "900"))  # seconds
+
+
+class RateLimiter:
+    """Hand out request slots at most once every `interval` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+        self._stopped = threading.Event()
+
+    def wait(self):
+        """Block until the caller's slot comes up; raise CancelledError once stopped."""
+        if self._stopped.is_set():
+            raise CancelledError()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0 and self._stopped.wait(delay):
+            raise CancelledError()
+
+    def stop(self):
+        """Wake every waiting caller and refuse all further slots."""
+        self._stopped.set()
+
+
+class PriceCache:
+    """SQLite-backed cache of Steam prices keyed by market hash name."""
+
+    def __init__(self, path=PRICE_CACHE_PATH, ttl=PRICE_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prices ("
+            "name TEXT PRIMARY KEY, price REAL NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, name):
+        """Return the cached price for `name`, or None if missing or stale."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT price, fetched_at FROM prices WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def set(self, name, price):
+        """Store a freshly fetched price."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prices (name, price, fetched_at) VALUES (?, ?, ?)",
+                (name, price, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
 
 def load_skins_from_csv(path=SKINS_CSV):
     """Return list of dicts with keys: name, wear, price (float)."""
@@ -50,75 +151,96 @@ def apply_fee(price, fee_rate):
     return round(price * (1 - fee_rate), 2)
 
 
-def main():
-    results = []
-    skins_list = load_skins_from_csv()
-    for entry in skins_list:
-        base_name = entry["name"]
-        wear = entry["wear"]
-        buy_price = entry["price"]
-        full_name = f"{base_name} ({wear})" if wear else base_name
-        print(f"Fetching: {full_name} ...")
+def format_cell(value):
+    """Format a result value for CSV: prices with 2 decimals, None as blank."""
+    if value is None:
+        return ""
+    if isinstance(value, (int, float)):
+        return f"{value:.2f}"
+    return value
 
-        steam_price = get_steam_price(full_name)
-        steam_after_fee = apply_fee(steam_price, STEAM_FEE)
 
-        # Calculate profit/loss — show zero/negative explicitly
-        steam_diff = (
-            round(steam_after_fee - buy_price, 2) if steam_after_fee is not None and buy_price is not None else None
-        )
+def profit_sort_key(row):
+    """Sort key for result rows: profit/loss, with unknown profits as 0."""
+    profit = row["Steam Profit/Loss ($)"]
+    return 0 if profit is None else profit
 
-        results.append(
-            {
-                "Skin": full_name,
-                "Bought For ($)": buy_price,
-                "Steam Price ($)": steam_price,
-                "Steam After Fee ($)": steam_after_fee,
-                "Steam Profit/Loss ($)": steam_diff,
-            }
-        )
 
-        time.sleep(2)  # avoid rate-limiting
+def fetch_one(session, limiter, cache, entry, refresh=False):
+    """Fetch the Steam price for one skin entry and build its result row."""
+    base_name = entry["name"]
+    wear = entry["wear"]
+    buy_price = entry["price"]
+    full_name = f"{base_name} ({wear})" if wear else base_name
+
+    steam_price = None if refresh else cache.get(full_name)
+    if steam_price is None:
+        limiter.wait()  # avoid rate-limiting
+        print(f"Fetching: {full_name} ...")
+        steam_price = get_steam_price(session, full_name)
+        if steam_price is not None:
+            cache.set(full_name, steam_price)
+    else:
+        print(f"Cached: {full_name}")
+    # Steam's fee is fixed, so use the precomputed share kept after it
+    steam_after_fee = round(steam_price * STEAM_KEEP, 2) if steam_price is not None else None
+
+    # Calculate profit/loss — show zero/negative explicitly
+    steam_diff = (
+        round(steam_after_fee - buy_price, 2) if steam_after_fee is not None and buy_price is not None else None
+    )
+
+    return {
+        "Skin": full_name,
+        "Bought For ($)": buy_price,
+        "Steam Price ($)": steam_price,
+        "Steam After Fee ($)": steam_after_fee,
+        "Steam Profit/Loss ($)": steam_diff,
+    }
+
+
+def main():
+    # --refresh ignores cached prices and fetches everything again
+    refresh = "--refresh" in sys.argv[1:]
+
+    skins_list = load_skins_from_csv()
+    limiter = RateLimiter(REQUEST_INTERVAL)
+    cache = PriceCache()
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+            futures = [ex.submit(fetch_one, SESSION, limiter, cache, entry, refresh) for entry in skins_list]
+            try:
+                # Collect in CSV order so equal profits keep a stable order after sorting
+                results = [future.result() for future in futures]
+            except BaseException:
+                # Ctrl-C or a failed lookup: drop queued skins and wake workers
+                # waiting for a slot so no further requests reach Steam
+                for future in futures:
+                    future.cancel()
+                limiter.stop()
+                raise
+    finally:
+        cache.close()
 
     # Sort results by most loss first (lowest profit/loss)
-    results_sorted = sorted(results, key=lambda x: x["Steam Profit/Loss ($)"] if x["Steam Profit/Loss ($)"] is not None else 0)
-
-    # Export to CSV
-    fieldnames = [
-        "Skin",
-        "Bought For ($)",
-        "Steam Price ($)",
-        "Steam After Fee ($)",
-        "Steam Profit/Loss ($)",
-    ]
-    normalized = []
-    for r in results_sorted:
-        row = {}
-        for fn in fieldnames:
-            v = r.get(fn)
-            if isinstance(v, (int, float)):
-                row[fn] = f"{v:.2f}"
-            elif v is None:
-                row[fn] = ""
-            else:
-                row[fn] = v
-        normalized.append(row)
+    results.sort(key=profit_sort_key)
 
+    # Export to CSV, formatting each row as it is written
     with open("cs2_prices.csv", "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(normalized)
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDNAMES)
+        writer.writerows([format_cell(r[fn]) for fn in CSV_FIELDNAMES] for r in results)
 
     print("\n✅ Exported results to cs2_prices.csv\n")
     # Robust totals (treat None as 0)
-    total_profit_steam = sum((float(r.get("Steam Profit/Loss ($)")) if r.get("Steam Profit/Loss ($)") is not None else 0) for r in results_sorted)
+    total_profit_steam = sum(r["Steam Profit/Loss ($)"] for r in results if r["Steam Profit/Loss ($)"] is not None)
 
     print(f"💰 Total Steam Profit/Loss (after fee): ${round(total_profit_steam, 2)}")
     print(f"💸 Total profit if I sell everything on Steam (after fee): ${round(total_profit_steam, 2)}")
 
     # Echo sorted results
     print("\nSorted items by most loss first:")
-    for r in results_sorted:
+    for r in results:
         print(f"{r['Skin']}: Profit/Loss = {r['Steam Profit/Loss ($)']}")
 
 
@@ -1,4 +1,5 @@
 import os
+import gzip
 import smtplib
 from email.message import EmailMessage
 
@@ -6,25 +7,35 @@ from email.message import EmailMessage
 EMAIL_USER = os.getenv('EMAIL_USER')
 EMAIL_PASS = os.getenv('EMAIL_PASS')
 EMAIL_TO = os.getenv('EMAIL_TO')
+# Set EMAIL_GZIP=1 to send the file gzip-compressed
+EMAIL_GZIP = os.getenv('EMAIL_GZIP', '').lower() in ('1', 'true', 'yes')
 
 if not EMAIL_USER or not EMAIL_PASS or not EMAIL_TO:
     raise ValueError("Please set EMAIL_USER, EMAIL_PASS, and EMAIL_TO environment variables.")
 
-# Read the file to send
+# Read the file to send as raw bytes (no decode/re-encode round trip)
 FILE_PATH = 'cs2_prices.csv'
-with open(FILE_PATH, 'r') as f:
+with open(FILE_PATH, 'rb') as f:
     file_content = f.read()
 
+if EMAIL_GZIP:
+    file_content = gzip.compress(file_content, compresslevel=6)
+    maintype, subtype = 'application', 'gzip'
+    attachment_name = f'{os.path.basename(FILE_PATH)}.gz'
+else:
+    maintype, subtype = 'text', 'csv'
+    attachment_name = os.path.basename(FILE_PATH)
+
 msg = EmailMessage()
 msg['Subject'] = f'CS2 Inventory File: {FILE_PATH}'
 msg['From'] = EMAIL_USER
 msg['To'] = EMAIL_TO
 msg.set_content(f'Attached is the file {FILE_PATH} from your CS2 inventory tracker project.')
-msg.add_attachment(file_content, filename=FILE_PATH)
+msg.add_attachment(file_content, maintype=maintype, subtype=subtype, filename=attachment_name)
 
 # Send the email (using Gmail SMTP)
 with smtplib.SMTP_SSL('smtp.gmail.com', 465) as smtp:
     smtp.login(EMAIL_USER, EMAIL_PASS)
     smtp.send_message(msg)
 
-print(f"Email sent to {EMAIL_TO} with {FILE_PATH} attached.")
+print(f"Email sent to {EMAIL_TO} with {attachment_name} attached.")
@@ -5,10 +5,73 @@ This script uses BeautifulSoup4 to scrape CS2 inventory items from a Steam profi
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
-import json
-import time
+from lxml import etree, html as lxml_html
+import orjson
+import msgpack
+import re
 import sys
+from collections import defaultdict
+
+
+# Profile URL formats that can be resolved without scraping the profile page
+PROFILE_URL_RE = re.compile(r'^(?:https?://)?(?:www\.)?steamcommunity\.com/profiles/(\d{17})(?:[/?#]|$)')
+VANITY_URL_RE = re.compile(r'^(?:https?://)?(?:www\.)?steamcommunity\.com/id/([^/?#]+)')
+XML_STEAM_ID_RE = re.compile(rb'<steamID64>(\d{17})</steamID64>')
+
+# Profile owner's Steam ID as embedded in the profile page's JavaScript
+PROFILE_STEAM_ID_RE = re.compile(rb'g_rgProfileData\s*=\s*\{[^}]*?"steamid"\s*:\s*"(\d{17})"')
+STEAM_ID_RE = re.compile(r'\b\d{17}\b')
+
+# Item tiles on an HTML inventory page (class may hold several names).
+# Pages are parsed as UTF-8, which is what Steam serves.
+UTF8_HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8')
+INVENTORY_ITEMS_XPATH = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' inventory_item_element ')]"
+)
+
+# Per-asset fields; everything else on an item comes from its description
+ASSET_FIELDS = ('asset_id', 'class_id', 'instance_id', 'amount')
+
+# Fields copied from an asset's description, with their defaults
+DESCRIPTION_FIELDS = (
+    ('name', 'Unknown'),
+    ('market_name', ''),
+    ('market_hash_name', ''),
+    ('type', ''),
+    ('tradable', 0),
+    ('marketable', 0),
+    ('commodity', 0),
+    ('icon_url', ''),
+    ('icon_url_large', ''),
+    ('name_color', ''),
+    ('background_color', ''),
+)
+
+# Tradable/marketable marks, indexed by the flag being set
+STATUS_MARKS = ("✗", "✓")
+SECTION_RULE = "-" * 80
+
+# Short description strings repeated across many different items
+INTERNED_FIELDS = ('type', 'name_color', 'background_color')
+
+
+def description_fields(description):
+    """Return the item fields (and tags, if any) taken from a description."""
+    get = description.get
+    fields = {key: get(key, default) for key, default in DESCRIPTION_FIELDS}
+    for key in INTERNED_FIELDS:
+        if isinstance(fields[key], str):
+            fields[key] = sys.intern(fields[key])
+    if 'tags' in description:
+        fields['tags'] = description['tags']
+    return fields
+
+
+# Fallback for assets without a description (never mutated)
+DEFAULT_DESCRIPTION_FIELDS = description_fields({})
 
 
 class CS2InventoryTracker:
@@ -35,6 +98,18 @@ class CS2InventoryTracker:
             'Upgrade-Insecure-Requests': '1'
         })
         
+        # Back off on throttling, honoring Steam's Retry-After header. 500 is
+        # left out because Steam answers private/empty inventories with it.
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=['GET'],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.session.mount('https://', HTTPAdapter(max_retries=retry))
+        
         # CS2 App ID
         self.app_id = 730  # CS2 (Counter-Strike 2) uses the same app ID as CS:GO
         self.context_id = 2
@@ -47,11 +122,31 @@ class CS2InventoryTracker:
                 self.steam_id = self.profile_url
                 return True
             
-            # Try to get Steam ID from vanity URL
+            # /profiles/<steamid> URLs already contain the ID
+            match = PROFILE_URL_RE.match(self.profile_url)
+            if match:
+                self.steam_id = match.group(1)
+                return True
+            
+            # /id/<vanity> URLs: ask Steam's small XML profile first
+            match = VANITY_URL_RE.match(self.profile_url)
+            if match:
+                steam_id = self.resolve_vanity_url(match.group(1))
+                if steam_id:
+                    self.steam_id = steam_id
+                    return True
+            
+            # Fall back to scraping the profile page
             response = self.session.get(self.profile_url, timeout=10)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Fast path: read the ID from the raw page without building a DOM
+            match = PROFILE_STEAM_ID_RE.search(response.content)
+            if match:
+                self.steam_id = match.group(1).decode('ascii')
+                return True
+            
+            soup = BeautifulSoup(response.content, 'lxml')
             
             # Look for Steam ID in various places
             # Method 1: Check for inventory link
@@ -75,10 +170,9 @@ class CS2InventoryTracker:
             for script in scripts:
                 if script.string and 'steamid' in script.string.lower():
                     # Try to extract 17-digit Steam ID
-                    import re
-                    matches = re.findall(r'\b\d{17}\b', script.string)
-                    if matches:
-                        self.steam_id = matches[0]
+                    match = STEAM_ID_RE.search(script.string)
+                    if match:
+                        self.steam_id = match.group(0)
                         return True
             
             print("Could not extract Steam ID from profile URL.")
@@ -89,6 +183,29 @@ class CS2InventoryTracker:
             print(f"Error extracting Steam ID: {e}")
             return False
     
+    def resolve_vanity_url(self, vanity):
+        """
+        Resolve a vanity profile name to a Steam ID via the XML profile.
+        
+        Args:
+            vanity: Custom profile name from a /id/<vanity> URL
+            
+        Returns:
+            17-digit Steam ID string, or None if it could not be resolved
+        """
+        try:
+            response = self.session.get(
+                f"https://steamcommunity.com/id/{vanity}/",
+                params={'xml': 1},
+                timeout=10
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+        
+        match = XML_STEAM_ID_RE.search(response.content)
+        return match.group(1).decode('ascii') if match else None
+    
     def fetch_inventory(self, start_assetid=None, count=5000):
         """
         Fetch inventory items using Steam's inventory API.
@@ -117,10 +234,15 @@ class CS2InventoryTracker:
         
         try:
             print(f"Fetching inventory from Steam ID: {self.steam_id}")
-            response = self.session.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
+            # Closing the streamed response hands the connection straight back
+            # to the pool and drops the page bytes once they are decoded
+            with self.session.get(url, params=params, timeout=30, stream=True) as response:
+                response.raise_for_status()
+
+                # Decode the gunzipped bytes directly; orjson never needs the
+                # str copy that response.json() builds as response.text
+                response.raw.decode_content = True
+                data = orjson.loads(response.raw.read())
             return data
             
         except requests.exceptions.HTTPError as e:
@@ -145,11 +267,21 @@ class CS2InventoryTracker:
         Returns:
             List of items parsed from HTML
         """
-        soup = BeautifulSoup(html_content, 'html.parser')
         items = []
         
-        # Look for inventory items in the HTML
-        inventory_items = soup.find_all('div', {'class': 'inventory_item_element'})
+        # Parse as UTF-8 bytes: lxml would otherwise guess Latin-1 for bytes
+        # without a <meta charset>, and rejects str with an XML declaration
+        if isinstance(html_content, str):
+            html_content = html_content.encode('utf-8')
+        try:
+            tree = lxml_html.fromstring(html_content, parser=UTF8_HTML_PARSER)
+        except (etree.ParserError, ValueError):
+            # Empty or comment-only markup has no items
+            return items
+        
+        # Look for inventory items in the HTML (lxml directly; only a few
+        # attributes are needed, so no BeautifulSoup tree is built)
+        inventory_items = INVENTORY_ITEMS_XPATH(tree)
         
         for item in inventory_items:
             try:
@@ -177,6 +309,11 @@ class CS2InventoryTracker:
         start_assetid = None
         has_more = True
         
+        # Map (classid, instanceid) to the item fields taken from its
+        # description. Kept across pages so every asset sharing a description
+        # (e.g. stacked cases) references the same field values.
+        descriptions_map = {}
+        
         while has_more:
             data = self.fetch_inventory(start_assetid=start_assetid)
             
@@ -188,46 +325,29 @@ class CS2InventoryTracker:
                 print("No items found or inventory is empty.")
                 break
             
-            # Create a mapping of classid_instanceid to descriptions
-            descriptions_map = {}
             for desc in data.get('descriptions', []):
-                key = f"{desc['classid']}_{desc['instanceid']}"
-                descriptions_map[key] = desc
+                key = (desc['classid'], desc['instanceid'])
+                if key not in descriptions_map:
+                    descriptions_map[key] = description_fields(desc)
             
             # Process each asset
             for asset in data.get('assets', []):
-                key = f"{asset['classid']}_{asset['instanceid']}"
-                description = descriptions_map.get(key, {})
+                fields = descriptions_map.get((asset['classid'], asset['instanceid']), DEFAULT_DESCRIPTION_FIELDS)
                 
                 item = {
                     'asset_id': asset.get('assetid'),
                     'class_id': asset.get('classid'),
                     'instance_id': asset.get('instanceid'),
                     'amount': asset.get('amount', '1'),
-                    'name': description.get('name', 'Unknown'),
-                    'market_name': description.get('market_name', ''),
-                    'market_hash_name': description.get('market_hash_name', ''),
-                    'type': description.get('type', ''),
-                    'tradable': description.get('tradable', 0),
-                    'marketable': description.get('marketable', 0),
-                    'commodity': description.get('commodity', 0),
-                    'icon_url': description.get('icon_url', ''),
-                    'icon_url_large': description.get('icon_url_large', ''),
-                    'name_color': description.get('name_color', ''),
-                    'background_color': description.get('background_color', '')
+                    **fields
                 }
                 
-                # Add tags if available
-                if 'tags' in description:
-                    item['tags'] = description['tags']
-                
                 all_items.append(item)
             
             # Check for pagination
             if data.get('more_items', 0) == 1 and 'last_assetid' in data:
                 start_assetid = data['last_assetid']
                 print(f"Fetching more items... (Current count: {len(all_items)})")
-                time.sleep(1)  # Be nice to Steam's servers
             else:
                 has_more = False
         
@@ -244,33 +364,36 @@ class CS2InventoryTracker:
             print("No items to display.")
             return
         
-        print(f"\n{'='*80}")
-        print(f"CS2 INVENTORY - Total Items: {len(items)}")
-        print(f"{'='*80}\n")
+        lines = [
+            f"\n{'='*80}",
+            f"CS2 INVENTORY - Total Items: {len(items)}",
+            f"{'='*80}\n",
+        ]
         
         # Group items by type
-        items_by_type = {}
+        items_by_type = defaultdict(list)
         for item in items:
-            item_type = item.get('type', 'Unknown')
-            if item_type not in items_by_type:
-                items_by_type[item_type] = []
-            items_by_type[item_type].append(item)
+            items_by_type[item.get('type', 'Unknown')].append(item)
         
         # Display items grouped by type
         for item_type, type_items in sorted(items_by_type.items()):
-            print(f"\n{item_type} ({len(type_items)} items):")
-            print("-" * 80)
+            lines.append(f"\n{item_type} ({len(type_items)} items):")
+            lines.append(SECTION_RULE)
             for item in type_items:
                 name = item.get('name', 'Unknown')
                 market_name = item.get('market_name', '')
-                tradable = "✓" if item.get('tradable', 0) == 1 else "✗"
-                marketable = "✓" if item.get('marketable', 0) == 1 else "✗"
+                tradable = STATUS_MARKS[item.get('tradable', 0) == 1]
+                marketable = STATUS_MARKS[item.get('marketable', 0) == 1]
                 
-                print(f"  • {name}")
+                lines.append(f"  • {name}")
                 if market_name and market_name != name:
-                    print(f"    Market Name: {market_name}")
-                print(f"    Tradable: {tradable} | Marketable: {marketable}")
-                print()
+                    lines.append(f"    Market Name: {market_name}")
+                lines.append(f"    Tradable: {tradable} | Marketable: {marketable}")
+                lines.append("")
+        
+        # One write instead of a print() call per line
+        lines.append("")
+        sys.stdout.write("\n".join(lines))
     
     def save_to_json(self, items, filename='inventory.json'):
         """
@@ -281,11 +404,37 @@ class CS2InventoryTracker:
             filename: Output filename
         """
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(items, f, indent=2, ensure_ascii=False)
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(items, option=orjson.OPT_INDENT_2))
             print(f"\nInventory saved to {filename}")
         except Exception as e:
             print(f"Error saving to JSON: {e}")
+    
+    def save_to_msgpack(self, items, filename='inventory.msgpack'):
+        """
+        Save inventory items to a compact MessagePack file.
+        
+        Descriptions are written once per classid/instanceid and assets only
+        keep their own fields, the same layout Steam's inventory API uses.
+        
+        Args:
+            items: List of inventory items
+            filename: Output filename
+        """
+        descriptions = {}
+        assets = []
+        for item in items:
+            key = f"{item.get('class_id')}_{item.get('instance_id')}"
+            if key not in descriptions:
+                descriptions[key] = {k: v for k, v in item.items() if k not in ASSET_FIELDS}
+            assets.append({k: item.get(k) for k in ASSET_FIELDS})
+        
+        try:
+            with open(filename, 'wb') as f:
+                msgpack.pack({'assets': assets, 'descriptions': descriptions}, f, use_bin_type=True)
+            print(f"\nInventory saved to {filename}")
+        except Exception as e:
+            print(f"Error saving to MessagePack: {e}")
 
 
 def main():
@@ -295,24 +444,28 @@ def main():
         print("CS2 Inventory Tracker")
         print("=" * 80)
         print("\nUsage:")
-        print("  python fetch_inventory.py [STEAM_PROFILE_URL]")
+        print("  python fetch_inventory.py [STEAM_PROFILE_URL] [--msgpack]")
         print("\nExamples:")
         print("  python fetch_inventory.py")
         print("  python fetch_inventory.py https://steamcommunity.com/id/farhankarim/inventory")
         print("  python fetch_inventory.py https://steamcommunity.com/profiles/76561198XXXXXXXXX")
+        print("  python fetch_inventory.py --msgpack")
         print("\nDefault profile: https://steamcommunity.com/id/farhankarim/inventory")
         print("\nNote: Steam inventory must be set to public.")
         print("\nOutput:")
         print("  - Console display of all inventory items")
         print("  - JSON file (inventory.json) with detailed item information")
+        print("  - With --msgpack: compact MessagePack file (inventory.msgpack) instead of JSON")
         return
     
     # Default profile URL
     profile_url = "https://steamcommunity.com/id/farhankarim/inventory"
     
-    # Allow custom profile URL from command line
-    if len(sys.argv) > 1:
-        profile_url = sys.argv[1]
+    # Allow custom profile URL and output format from command line
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    use_msgpack = '--msgpack' in sys.argv[1:]
+    if args:
+        profile_url = args[0]
     
     print("CS2 Inventory Tracker")
     print("=" * 80)
@@ -328,8 +481,11 @@ def main():
         # Display items
         tracker.display_items(items)
         
-        # Save to JSON
-        tracker.save_to_json(items)
+        # Save to JSON (or MessagePack for archival runs)
+        if use_msgpack:
+            tracker.save_to_msgpack(items)
+        else:
+            tracker.save_to_json(items)
         
         print(f"\n{'='*80}")
         print(f"Successfully fetched {len(items)} items from the inventory!")